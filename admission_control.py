@@ -0,0 +1,208 @@
+"""
+Admission Control Module
+========================
+Bounds how much inference work the FastAPI service accepts at once.
+
+Requests are admitted into priority lanes (e.g. "interactive" single
+predictions and "bulk" batch work). All lanes share a global pool of
+execution slots; each lane also has its own concurrency limit and a cap on
+how many requests may wait for a slot. When a slot frees up, waiters from
+the highest-priority lane are served first.
+
+Requests that cannot be admitted fail fast instead of piling up:
+- 429 when the lane's wait queue is already full
+- 503 when a queued request waits longer than the lane's queue timeout
+Both carry a Retry-After header estimated from recent service times.
+
+Usage:
+    controller = AdmissionController(max_concurrency=4, lanes=[
+        Lane('interactive', priority=0, max_concurrency=4, max_queue=32, queue_timeout=2.0),
+        Lane('bulk', priority=1, max_concurrency=1, max_queue=8, queue_timeout=5.0),
+    ])
+
+    async with controller.slot('interactive'):
+        result = await run_in_threadpool(inference_engine.predict, input_dict)
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+from fastapi import HTTPException
+
+
+class Lane:
+    """Configuration and live counters for one priority lane."""
+
+    def __init__(self, name: str, priority: int, max_concurrency: int, max_queue: int, queue_timeout: float):
+        """
+        Args:
+            name: Lane name used by endpoints and in stats
+            priority: Lower value is served first
+            max_concurrency: Maximum requests of this lane running at once
+            max_queue: Maximum requests of this lane waiting for a slot
+            queue_timeout: Seconds a request may wait before being shed
+        """
+        self.name = name
+        self.priority = priority
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+
+        self.active = 0
+        self.waiting: deque = deque()
+        self.admitted = 0
+        self.completed = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        # Exponentially weighted average of service time in seconds
+        self.avg_service_time = 0.0
+
+    def stats(self) -> dict:
+        """Snapshot of the lane counters."""
+        return {
+            'priority': self.priority,
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'queue_timeout': self.queue_timeout,
+            'active': self.active,
+            'queue_depth': len(self.waiting),
+            'admitted': self.admitted,
+            'completed': self.completed,
+            'shed_queue_full': self.shed_queue_full,
+            'shed_timeout': self.shed_timeout,
+            'avg_service_ms': round(self.avg_service_time * 1000, 3)
+        }
+
+
+class AdmissionController:
+    """
+    Priority-aware concurrency limiter for the inference endpoints.
+
+    All bookkeeping happens on the event loop thread, so no locks are needed;
+    the guarded work itself may run in a thread pool.
+    """
+
+    # Weight of the newest sample in the service time average
+    _EWMA_ALPHA = 0.2
+
+    def __init__(self, max_concurrency: int, lanes: List[Lane]):
+        """
+        Args:
+            max_concurrency: Execution slots shared by all lanes
+            lanes: Lane definitions
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.lanes: Dict[str, Lane] = {lane.name: lane for lane in lanes}
+        self._by_priority = sorted(lanes, key=lambda lane: lane.priority)
+        self.active = 0
+
+    def _can_run(self, lane: Lane) -> bool:
+        return self.active < self.max_concurrency and lane.active < lane.max_concurrency
+
+    def _has_priority_waiters(self, lane: Lane) -> bool:
+        """Whether a lane of equal or higher priority has runnable waiters."""
+        for other in self._by_priority:
+            if other.priority > lane.priority:
+                return False
+            if other.waiting and other.active < other.max_concurrency:
+                return True
+        return False
+
+    def _start(self, lane: Lane):
+        self.active += 1
+        lane.active += 1
+        lane.admitted += 1
+
+    def _dispatch(self):
+        """Hand free slots to waiters, highest priority lane first."""
+        for lane in self._by_priority:
+            while lane.waiting and self._can_run(lane):
+                waiter = lane.waiting.popleft()
+                if waiter.done():
+                    continue
+                self._start(lane)
+                waiter.set_result(None)
+
+    def _retry_after(self, lane: Lane) -> int:
+        """Estimate in whole seconds when capacity is likely to be available."""
+        backlog = len(lane.waiting) + lane.active
+        estimate = lane.avg_service_time * backlog / lane.max_concurrency
+        return max(1, math.ceil(estimate))
+
+    def _reject(self, lane: Lane, status_code: int, reason: str):
+        raise HTTPException(
+            status_code=status_code,
+            detail=f"Service overloaded ({lane.name} lane {reason}), retry later",
+            headers={"Retry-After": str(self._retry_after(lane))}
+        )
+
+    async def acquire(self, lane_name: str):
+        """Wait for an execution slot in the given lane or raise 429/503."""
+        lane = self.lanes[lane_name]
+
+        if self._can_run(lane) and not self._has_priority_waiters(lane):
+            self._start(lane)
+            return
+
+        if len(lane.waiting) >= lane.max_queue:
+            lane.shed_queue_full += 1
+            self._reject(lane, 429, "queue full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiting.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=lane.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # Slot was granted just as the timeout fired
+                return
+            waiter.cancel()
+            lane.waiting.remove(waiter)
+            lane.shed_timeout += 1
+            self._reject(lane, 503, "queue timeout")
+        except asyncio.CancelledError:
+            # Client went away while waiting
+            if waiter.done() and not waiter.cancelled():
+                self.release(lane_name, 0.0)
+            else:
+                waiter.cancel()
+                if waiter in lane.waiting:
+                    lane.waiting.remove(waiter)
+            raise
+
+    def release(self, lane_name: str, service_time: float):
+        """Return a slot and wake the next waiter."""
+        lane = self.lanes[lane_name]
+        self.active -= 1
+        lane.active -= 1
+        lane.completed += 1
+        if service_time > 0:
+            if lane.avg_service_time == 0.0:
+                lane.avg_service_time = service_time
+            else:
+                lane.avg_service_time += self._EWMA_ALPHA * (service_time - lane.avg_service_time)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, lane_name: str):
+        """Async context manager holding an execution slot for the block."""
+        await self.acquire(lane_name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(lane_name, time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        """Queue depth, active work and shed counts for autoscaling."""
+        return {
+            'max_concurrency': self.max_concurrency,
+            'active': self.active,
+            'queue_depth': sum(len(lane.waiting) for lane in self.lanes.values()),
+            'shed_total': sum(lane.shed_queue_full + lane.shed_timeout for lane in self.lanes.values()),
+            'lanes': {name: lane.stats() for name, lane in self.lanes.items()}
+        }
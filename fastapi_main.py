@@ -4,17 +4,29 @@ Predictive Maintenance FastAPI Service
 This FastAPI service provides ML inference endpoints for the predictive maintenance system.
 It wraps the inference.py module and exposes it via REST API.
 
+Inference endpoints accept an optional `model_key` query parameter to pick
+a model set from the registry (defaults to the set in MODEL_DIR itself).
+
 Endpoints:
 - POST /api/predict - Single machine prediction
 - POST /api/predict/batch - Batch predictions
+- POST /api/predict/top-k - Highest-risk machines from a large set of readings
 - GET /health - Health check
 - GET /api/model/info - Model information
+- GET /api/models - Model registry status
+- GET /api/drift - Input feature drift report
+- POST /api/drift/reset - Reset live drift sketches
+- GET /api/admission/stats - Queue depth and load shedding counters
+- WS /ws/predict - Streaming predictions over a persistent connection
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+import asyncio
+import json
 import uvicorn
 import sys
 import os
@@ -22,8 +34,10 @@ import os
 # Add models directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'models'))
 from inference import PredictiveMaintenanceInference
+from model_registry import ModelRegistry
 
 from dotenv import load_dotenv
+from admission_control import AdmissionController, Lane
 
 # Load environment variables
 load_dotenv()
@@ -44,8 +58,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global inference engine
-inference_engine: Optional[PredictiveMaintenanceInference] = None
+# Global model registry (one inference engine per model set, loaded lazily)
+registry: Optional[ModelRegistry] = None
+
+# Admission control: interactive single predictions are served before bulk work
+INTERACTIVE_LANE = "interactive"
+BULK_LANE = "bulk"
+
+admission = AdmissionController(
+    max_concurrency=int(os.getenv("ADMISSION_MAX_CONCURRENCY", "4")),
+    lanes=[
+        Lane(
+            INTERACTIVE_LANE,
+            priority=0,
+            max_concurrency=int(os.getenv("PREDICT_MAX_CONCURRENCY", "4")),
+            max_queue=int(os.getenv("PREDICT_MAX_QUEUE", "64")),
+            queue_timeout=float(os.getenv("PREDICT_QUEUE_TIMEOUT", "2"))
+        ),
+        Lane(
+            BULK_LANE,
+            priority=1,
+            max_concurrency=int(os.getenv("BATCH_MAX_CONCURRENCY", "2")),
+            max_queue=int(os.getenv("BATCH_MAX_QUEUE", "16")),
+            queue_timeout=float(os.getenv("BATCH_QUEUE_TIMEOUT", "5"))
+        ),
+    ]
+)
+
+# WebSocket streaming: readings per coalesced batch, readings buffered per
+# connection before the socket stops being read, and how long to wait for
+# more readings to coalesce
+WS_MAX_BATCH = int(os.getenv("WS_MAX_BATCH", "256"))
+WS_MAX_PENDING = int(os.getenv("WS_MAX_PENDING", "1024"))
+WS_COALESCE_SECONDS = float(os.getenv("WS_COALESCE_MS", "2")) / 1000
 
 
 # ============================================
@@ -77,6 +122,16 @@ class SensorData(BaseModel):
         }
 
 
+# Same bounds as SensorData, for the streaming endpoint which skips Pydantic
+SENSOR_LIMITS = {
+    "Air temperature": (0, 400),
+    "Process temperature": (0, 400),
+    "Rotational speed": (0, 10000),
+    "Torque": (0, 200),
+    "Tool wear": (0, 300)
+}
+
+
 class PredictionResponse(BaseModel):
     """Output model for predictions"""
     machine_id: Optional[str] = None
@@ -86,6 +141,7 @@ class PredictionResponse(BaseModel):
     most_likely_failure: Optional[str] = Field(None, description="Most likely failure type")
     recommended_action: str = Field(..., description="Maintenance recommendation")
     feature_contributions: List[Dict[str, Any]] = Field(..., description="Top contributing features")
+    reused: bool = Field(False, description="Previous result for this machine returned (reading within tolerances)")
 
 
 class BatchPredictionRequest(BaseModel):
@@ -99,6 +155,25 @@ class BatchPredictionResponse(BaseModel):
     total_count: int
 
 
+class TopKPredictionRequest(BaseModel):
+    """Input model for top-K risk ranking"""
+    sensor_data: List[SensorData]
+    k: int = Field(20, description="Number of highest-risk machines to return", ge=1, le=1000)
+
+
+class RankedPrediction(PredictionResponse):
+    """Prediction with its position in the risk ranking"""
+    rank: int = Field(..., description="1 = highest risk_score")
+    index: int = Field(..., description="Position of the reading in the request")
+
+
+class TopKPredictionResponse(BaseModel):
+    """Output model for top-K risk ranking"""
+    predictions: List[RankedPrediction]
+    k: int
+    total_count: int = Field(..., description="Number of readings scored")
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
@@ -115,21 +190,225 @@ class ModelInfoResponse(BaseModel):
     shap_available: bool
 
 
+class FeatureDrift(BaseModel):
+    """Drift scores for a single monitored column"""
+    psi: Optional[float] = Field(None, description="Population Stability Index vs reference")
+    ks: Optional[float] = Field(None, description="Binned Kolmogorov-Smirnov statistic vs reference")
+    status: str = Field(..., description="stable, moderate, significant or insufficient_data")
+
+
+class DriftScope(BaseModel):
+    """Drift scores for one product Type (or all types)"""
+    type: str
+    live_samples: int
+    reference_samples: int
+    max_psi: Optional[float] = None
+    features: Dict[str, FeatureDrift]
+
+
+class ModelStats(BaseModel):
+    """Load and usage counters for one model set"""
+    key: str
+    model_dir: str
+    loaded: bool
+    model_file_mb: float = Field(..., description="Serialized .joblib size, the proxy used for the memory budget")
+    load_time_ms: float
+    load_count: int
+    eviction_count: int
+    request_count: int = Field(..., description="Inference requests served")
+    last_used: Optional[float] = Field(None, description="Unix timestamp of the last request")
+    drift_monitoring: bool
+    rescore_cache: Optional[Dict[str, Any]] = Field(None, description="Result reuse counters (None if disabled)")
+
+
+class ModelRegistryResponse(BaseModel):
+    """Model registry status response"""
+    default_model: str
+    memory_budget_mb: float = Field(..., description="Compared against loaded_model_file_mb; 0 means unlimited")
+    loaded_model_file_mb: float
+    loaded_models: List[str]
+    models: List[ModelStats]
+
+
+class DriftReportResponse(BaseModel):
+    """Drift report response"""
+    reference_source: Optional[str] = None
+    reference_created_at: Optional[str] = None
+    n_bins: int
+    by_type: List[DriftScope]
+    overall: DriftScope
+
+
+def to_input_dict(sensor_data: SensorData) -> Dict[str, Any]:
+    """Convert a SensorData model to the dict format expected by inference"""
+    return {
+        "Type": sensor_data.Type,
+        "Air temperature": sensor_data.air_temperature,
+        "Process temperature": sensor_data.process_temperature,
+        "Rotational speed": sensor_data.rotational_speed,
+        "Torque": sensor_data.torque,
+        "Tool wear": sensor_data.tool_wear
+    }
+
+
+async def get_engine(model_key: Optional[str], count_request: bool = True) -> PredictiveMaintenanceInference:
+    """Resolve a model set from the registry, loading it off the event loop"""
+    if registry is None:
+        raise HTTPException(status_code=503, detail="ML models not loaded")
+    
+    key = model_key or registry.default_key
+    if key not in registry:
+        raise HTTPException(status_code=404, detail=f"Unknown model '{key}'")
+    
+    try:
+        return await run_in_threadpool(registry.get, key, count_request)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Failed to load model '{key}': {str(e)}")
+
+
+def get_drift_monitor(model_key: Optional[str]):
+    """Resolve the drift monitor of a model set without loading the models"""
+    if registry is None:
+        raise HTTPException(status_code=503, detail="ML models not loaded")
+    
+    key = model_key or registry.default_key
+    if key not in registry:
+        raise HTTPException(status_code=404, detail=f"Unknown model '{key}'")
+    
+    monitor = registry.entries[key].drift_monitor
+    if monitor is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Drift monitoring not enabled for '{key}' (no reference profile or model not loaded yet)"
+        )
+    return monitor
+
+
+# ============================================
+# Streaming Helpers
+# ============================================
+
+# Queued by the reader when the client disconnects
+_STREAM_END = object()
+
+
+def parse_stream_reading(item: Any) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any], Optional[str]]:
+    """
+    Validate a streamed reading without building a Pydantic model.
+    
+    Returns the inference input dict (or None), the identifiers to echo
+    back with the result, and an error message (or None).
+    """
+    if isinstance(item, ValueError):
+        # Message that could not be decoded by the reader
+        return None, {}, str(item)
+    if not isinstance(item, dict):
+        return None, {}, "Reading must be a JSON object"
+    
+    echo = {"id": item.get("id"), "machine_id": item.get("machine_id")}
+    
+    # Same contract as SensorData.machine_id (Optional[str]); also keeps it hashable for the rescore cache
+    if echo["machine_id"] is not None and not isinstance(echo["machine_id"], str):
+        return None, echo, "'machine_id' must be a string"
+    
+    if item.get("Type") not in ("L", "M", "H"):
+        return None, echo, "'Type' must be one of L, M, H"
+    
+    input_dict = {"Type": item["Type"]}
+    for name, (low, high) in SENSOR_LIMITS.items():
+        value = item.get(name)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+            return None, echo, f"'{name}' must be a number between {low} and {high}"
+        input_dict[name] = value
+    
+    return input_dict, echo, None
+
+
+async def read_stream(websocket: WebSocket, queue: asyncio.Queue):
+    """
+    Receive readings into the connection queue.
+    
+    A message may hold one reading or a list of readings. When the queue
+    is full this stops reading from the socket, pushing backpressure to
+    the client.
+    """
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                payload = json.loads(message)
+            except ValueError as e:
+                payload = ValueError(f"Invalid JSON: {e}")
+            
+            for item in (payload if isinstance(payload, list) else [payload]):
+                await queue.put(item)
+    except Exception:
+        # Disconnected (or an unreadable frame): let the scorer finish up
+        pass
+    await queue.put(_STREAM_END)
+
+
+async def score_stream_batch(batch: list, model_key: Optional[str]) -> List[Dict[str, Any]]:
+    """Score a coalesced batch of streamed readings in one vectorized call"""
+    parsed = [parse_stream_reading(item) for item in batch]
+    inputs = [input_dict for input_dict, _, error in parsed if error is None]
+    machine_ids = [echo["machine_id"] for _, echo, error in parsed if error is None]
+    
+    predictions = []
+    failure = None
+    if inputs:
+        try:
+            async with admission.slot(BULK_LANE):
+                inference_engine = await get_engine(model_key)
+                predictions = await run_in_threadpool(inference_engine.predict_batch, inputs, machine_ids)
+        except HTTPException as e:
+            failure = {"error": e.detail, "retry_after": (e.headers or {}).get("Retry-After")}
+        except Exception as e:
+            failure = {"error": f"Prediction failed: {str(e)}"}
+    
+    results = []
+    prediction_iter = iter(predictions)
+    for input_dict, echo, error in parsed:
+        if error is not None:
+            results.append({**echo, "error": error})
+        elif failure is not None:
+            results.append({**echo, **failure})
+        else:
+            results.append({**echo, **next(prediction_iter)})
+    return results
+
+
 # ============================================
 # Startup/Shutdown Events
 # ============================================
 
 @app.on_event("startup")
 async def startup_event():
-    """Load ML models on startup"""
-    global inference_engine
+    """Discover model sets and load the default one on startup"""
+    global registry
     try:
         model_dir = os.getenv("MODEL_DIR", "models")
-        inference_engine = PredictiveMaintenanceInference(model_dir)
-        print(f"✅ Inference engine loaded from '{model_dir}'")
+        registry = ModelRegistry(
+            model_dir,
+            default_key=os.getenv("DEFAULT_MODEL_KEY", "default"),
+            memory_budget_mb=float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0")),
+            rescore_cache_size=int(os.getenv("RESCORE_CACHE_SIZE", "10000")),
+            rescore_tolerances=json.loads(os.getenv("RESCORE_TOLERANCES", "{}")),
+            rescore_idle_seconds=float(os.getenv("RESCORE_IDLE_SECONDS", "3600"))
+        )
+        print(f"✅ Model registry found {registry.keys()} in '{model_dir}'")
     except Exception as e:
-        print(f"❌ Failed to load inference engine: {e}")
-        inference_engine = None
+        print(f"❌ Failed to initialize model registry: {e}")
+        registry = None
+        return
+    
+    # Other model sets (and drift references) load lazily on first use
+    if registry.default_key in registry:
+        try:
+            registry.get(registry.default_key)
+            print(f"✅ Inference engine loaded for '{registry.default_key}'")
+        except Exception as e:
+            print(f"❌ Failed to load inference engine: {e}")
 
 
 @app.on_event("shutdown")
@@ -156,7 +435,8 @@ async def root():
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
     """Check if the service and models are loaded"""
-    if inference_engine is None:
+    # The default model may be evicted under the memory budget and reloaded on demand
+    if registry is None or not registry.is_available(registry.default_key):
         return HealthResponse(
             status="unhealthy",
             model_loaded=False,
@@ -171,7 +451,11 @@ async def health_check():
 
 
 @app.post("/api/predict", response_model=PredictionResponse, tags=["Prediction"])
-async def predict(sensor_data: SensorData):
+async def predict(
+    sensor_data: SensorData,
+    model_key: Optional[str] = Query(None, description="Model set to use (default model if omitted)"),
+    x_request_priority: Optional[str] = Header(None, description="Send 'bulk' for sweep traffic")
+):
     """
     Make a prediction for a single machine.
     
@@ -180,81 +464,111 @@ async def predict(sensor_data: SensorData):
     - Failure type predictions
     - Maintenance recommendations
     - Feature importance explanations
+    
+    Requests run in the interactive lane unless the X-Request-Priority
+    header is 'bulk'. Returns 429/503 with Retry-After when overloaded.
     """
-    if inference_engine is None:
-        raise HTTPException(status_code=503, detail="ML models not loaded")
+    lane = BULK_LANE if x_request_priority == BULK_LANE else INTERACTIVE_LANE
     
-    try:
-        # Convert Pydantic model to dict for inference
-        input_dict = {
-            "Type": sensor_data.Type,
-            "Air temperature": sensor_data.air_temperature,
-            "Process temperature": sensor_data.process_temperature,
-            "Rotational speed": sensor_data.rotational_speed,
-            "Torque": sensor_data.torque,
-            "Tool wear": sensor_data.tool_wear
-        }
-        
-        # Run inference
-        result = inference_engine.predict(input_dict)
-        
-        # Add machine_id if provided
-        result["machine_id"] = sensor_data.machine_id
-        
-        return PredictionResponse(**result)
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+    async with admission.slot(lane):
+        inference_engine = await get_engine(model_key)
+        try:
+            # Convert Pydantic model to dict for inference
+            input_dict = to_input_dict(sensor_data)
+            
+            # Run inference off the event loop
+            result = await run_in_threadpool(inference_engine.predict, input_dict, sensor_data.machine_id)
+            
+            # Add machine_id if provided
+            result["machine_id"] = sensor_data.machine_id
+            
+            return PredictionResponse(**result)
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
 @app.post("/api/predict/batch", response_model=BatchPredictionResponse, tags=["Prediction"])
-async def predict_batch(request: BatchPredictionRequest):
+async def predict_batch(
+    request: BatchPredictionRequest,
+    model_key: Optional[str] = Query(None, description="Model set to use (default model if omitted)")
+):
     """
     Make predictions for multiple machines.
     
     This endpoint accepts an array of sensor readings and returns
-    predictions for each machine.
+    predictions for each machine. Runs in the bulk lane.
     """
-    if inference_engine is None:
-        raise HTTPException(status_code=503, detail="ML models not loaded")
+    async with admission.slot(BULK_LANE):
+        inference_engine = await get_engine(model_key)
+        try:
+            # Run inference over the whole batch at once, off the event loop
+            results = await run_in_threadpool(
+                inference_engine.predict_batch,
+                [to_input_dict(sensor_data) for sensor_data in request.sensor_data],
+                [sensor_data.machine_id for sensor_data in request.sensor_data]
+            )
+            
+            predictions = []
+            for sensor_data, result in zip(request.sensor_data, results):
+                result["machine_id"] = sensor_data.machine_id
+                predictions.append(PredictionResponse(**result))
+            
+            return BatchPredictionResponse(
+                predictions=predictions,
+                total_count=len(predictions)
+            )
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+
+@app.post("/api/predict/top-k", response_model=TopKPredictionResponse, tags=["Prediction"])
+async def predict_top_k(
+    request: TopKPredictionRequest,
+    model_key: Optional[str] = Query(None, description="Model set to use (default model if omitted)")
+):
+    """
+    Return the K machines most likely to fail.
     
-    try:
-        predictions = []
-        
-        for sensor_data in request.sensor_data:
-            # Convert to dict
-            input_dict = {
-                "Type": sensor_data.Type,
-                "Air temperature": sensor_data.air_temperature,
-                "Process temperature": sensor_data.process_temperature,
-                "Rotational speed": sensor_data.rotational_speed,
-                "Torque": sensor_data.torque,
-                "Tool wear": sensor_data.tool_wear
-            }
+    Every reading gets a risk score from one vectorized binary model pass;
+    failure types, explanations and recommendations are computed only for
+    the top K. Runs in the bulk lane.
+    """
+    async with admission.slot(BULK_LANE):
+        inference_engine = await get_engine(model_key)
+        try:
+            ranked = await run_in_threadpool(
+                inference_engine.predict_top_k,
+                [to_input_dict(sensor_data) for sensor_data in request.sensor_data],
+                request.k
+            )
             
-            # Run inference
-            result = inference_engine.predict(input_dict)
-            result["machine_id"] = sensor_data.machine_id
-            predictions.append(PredictionResponse(**result))
-        
-        return BatchPredictionResponse(
-            predictions=predictions,
-            total_count=len(predictions)
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+            predictions = []
+            for rank, (index, result) in enumerate(ranked, start=1):
+                result["machine_id"] = request.sensor_data[index].machine_id
+                predictions.append(RankedPrediction(**result, rank=rank, index=index))
+            
+            return TopKPredictionResponse(
+                predictions=predictions,
+                k=len(predictions),
+                total_count=len(request.sensor_data)
+            )
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Top-K prediction failed: {str(e)}")
 
 
 @app.get("/api/model/info", response_model=ModelInfoResponse, tags=["Model"])
-async def get_model_info():
+async def get_model_info(
+    model_key: Optional[str] = Query(None, description="Model set to describe (default model if omitted)")
+):
     """
     Get information about the loaded ML models.
     
     Returns model metadata, feature list, and configuration details.
     """
-    if inference_engine is None:
-        raise HTTPException(status_code=503, detail="ML models not loaded")
+    inference_engine = await get_engine(model_key, count_request=False)
     
     try:
         info = inference_engine.get_model_info()
@@ -269,6 +583,99 @@ async def get_model_info():
         raise HTTPException(status_code=500, detail=f"Failed to get model info: {str(e)}")
 
 
+@app.get("/api/models", response_model=ModelRegistryResponse, tags=["Model"])
+async def get_models():
+    """
+    Get model registry status.
+    
+    Lists every discovered model set with its load time, model file size,
+    inference request count, result reuse counters and whether it is loaded.
+    """
+    if registry is None:
+        raise HTTPException(status_code=503, detail="ML models not loaded")
+    
+    return ModelRegistryResponse(**registry.stats())
+
+
+@app.get("/api/drift", response_model=DriftReportResponse, tags=["Monitoring"])
+async def get_drift_report(
+    model_key: Optional[str] = Query(None, description="Model set to report on (default model if omitted)")
+):
+    """
+    Get input feature drift scores.
+    
+    Compares the live per-Type histograms of every raw and engineered
+    feature, plus the risk_score, against the reference profile.
+    """
+    drift_monitor = get_drift_monitor(model_key)
+    return DriftReportResponse(**drift_monitor.report())
+
+
+@app.post("/api/drift/reset", tags=["Monitoring"])
+async def reset_drift(
+    model_key: Optional[str] = Query(None, description="Model set to reset (default model if omitted)")
+):
+    """Clear the live drift sketches, e.g. after a model or process change."""
+    drift_monitor = get_drift_monitor(model_key)
+    drift_monitor.reset()
+    return {"message": "Drift sketches reset"}
+
+
+@app.get("/api/admission/stats", tags=["Monitoring"])
+async def get_admission_stats():
+    """
+    Get admission control counters.
+    
+    Reports active work, queue depth and shed counts per lane, suitable
+    as autoscaling signals.
+    """
+    return admission.stats()
+
+
+@app.websocket("/ws/predict")
+async def predict_stream(websocket: WebSocket, model_key: Optional[str] = None):
+    """
+    Stream sensor readings and receive predictions on the same connection.
+    
+    Send readings as JSON objects (same fields as POST /api/predict, plus an
+    optional `id` echoed back) or JSON arrays of them. Readings that arrive
+    close together are scored as one batch and answered with a single
+    `{"results": [...]}` message, in arrival order. Readings that fail
+    validation or are shed under load come back with an `error` field.
+    """
+    await websocket.accept()
+    
+    queue: asyncio.Queue = asyncio.Queue(maxsize=WS_MAX_PENDING)
+    reader = asyncio.create_task(read_stream(websocket, queue))
+    
+    try:
+        ended = False
+        while not ended:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            batch = [item]
+            
+            # Give closely spaced readings a moment to arrive, then drain the queue
+            if queue.empty() and WS_COALESCE_SECONDS > 0:
+                await asyncio.sleep(WS_COALESCE_SECONDS)
+            while len(batch) < WS_MAX_BATCH and not queue.empty():
+                item = queue.get_nowait()
+                if item is _STREAM_END:
+                    ended = True
+                    break
+                batch.append(item)
+            
+            results = await score_stream_batch(batch, model_key)
+            # Awaiting the send paces scoring to the client's read speed
+            await websocket.send_text(json.dumps({"results": results}))
+    except (WebSocketDisconnect, RuntimeError):
+        # Client went away mid-send
+        pass
+    finally:
+        reader.cancel()
+
+
 # ============================================
 # Main Entry Point
 # ============================================
@@ -0,0 +1,332 @@
+"""
+Input Drift Monitoring Module
+=============================
+Keeps constant-memory streaming histograms of every model input (raw and
+engineered features) plus the predicted risk_score, split per product Type,
+and compares them with a reference profile built from a baseline dataset.
+
+Each monitored column uses fixed-width bins between the reference 0.5th and
+99.5th percentiles, with one underflow and one overflow bin. Updating the
+sketches for a batch is a handful of vectorized numpy operations followed by
+a single bincount, so memory stays at Types x Columns x Bins counters.
+Single readings are copied into a small fixed buffer and binned together
+once it fills (or when a report is requested), keeping the per-prediction
+cost to a row copy.
+
+Usage:
+    # Build the reference profile once from a baseline CSV
+    python models/drift_monitor.py baseline.csv --out models/drift_reference.json
+
+    # In the service
+    monitor = FeatureDriftMonitor.load('models/drift_reference.json', inference.feature_cols)
+    inference.drift_monitor = monitor
+    report = monitor.report()
+"""
+
+import numpy as np
+import pandas as pd
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+
+
+# PSI rule-of-thumb thresholds
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+# Smoothing for empty bins so PSI stays finite
+_EPSILON = 1e-4
+
+# Single readings buffered before being binned together
+PENDING_ROWS = 256
+
+TYPE_COLUMN = 'Type_encoded'
+RISK_COLUMN = 'risk_score'
+
+
+class FeatureDriftMonitor:
+    """
+    Streaming per-Type histograms of model inputs and risk scores.
+
+    This class:
+    1. Bins engineered feature matrices and risk scores per batch
+    2. Accumulates counts per product Type in a fixed-size array
+    3. Reports PSI and KS drift scores against a reference profile
+    """
+
+    def __init__(self, reference: dict, feature_cols: list):
+        """
+        Initialize the monitor from a reference profile.
+
+        Args:
+            reference: Reference profile (see build_reference_profile)
+            feature_cols: Column order of the engineered feature matrix
+                that will be passed to update()
+        """
+        self.types = list(reference['types'])
+        self.columns = list(reference['columns'])
+        self.n_bins = int(reference['n_bins'])
+        self.source = reference.get('source')
+        self.created_at = reference.get('created_at')
+
+        missing = [c for c in self.columns if c != RISK_COLUMN and c not in feature_cols]
+        if missing or TYPE_COLUMN not in feature_cols:
+            raise ValueError(
+                f"Reference profile does not match model features. Missing: {missing or [TYPE_COLUMN]}"
+            )
+
+        # Positions of monitored features in the engineered matrix (risk_score is appended last)
+        self._feature_index = np.array(
+            [feature_cols.index(c) for c in self.columns if c != RISK_COLUMN], dtype=np.intp
+        )
+        self._type_index = feature_cols.index(TYPE_COLUMN)
+
+        self.lower = np.asarray(reference['lower'], dtype=np.float64)
+        self.upper = np.asarray(reference['upper'], dtype=np.float64)
+        # Degenerate columns (e.g. rarely-set risk flags) get a near-infinite
+        # scale so they split into below / at / above the reference value
+        width = self.upper - self.lower
+        self._inv_width = np.divide(
+            self.n_bins, width, out=np.full_like(width, 1e12), where=width > 0
+        )
+
+        # counts[type, column, bin]; bin 0 = underflow, bin n_bins + 1 = overflow
+        shape = (len(self.types), len(self.columns), self.n_bins + 2)
+        # +1 shifts the clipped bin range [-1, n_bins] onto [0, n_bins + 1]
+        self._bin_base = np.arange(shape[1], dtype=np.intp) * shape[2] + 1
+        self._type_stride = shape[1] * shape[2]
+
+        reference_counts = reference.get('counts')
+        if reference_counts is None:
+            self.reference_counts = np.zeros(shape, dtype=np.int64)
+        else:
+            self.reference_counts = np.asarray(reference_counts, dtype=np.int64).reshape(shape)
+        self.counts = np.zeros(shape, dtype=np.int64)
+
+        # Buffer for single readings, binned in bulk by _flush_pending
+        self._pending_X = np.empty((PENDING_ROWS, len(feature_cols)), dtype=np.float64)
+        self._pending_risk = np.empty(PENDING_ROWS, dtype=np.float64)
+        self._pending = 0
+
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str, feature_cols: list) -> 'FeatureDriftMonitor':
+        """Load a monitor from a reference profile JSON file."""
+        with open(path, 'r') as f:
+            reference = json.load(f)
+        return cls(reference, feature_cols)
+
+    def _flat_bins(self, X: np.ndarray, risk_scores: np.ndarray) -> np.ndarray:
+        """Map a batch to flat indices into self.counts (one per row and column)."""
+        n = X.shape[0]
+        values = np.empty((n, len(self.columns)), dtype=np.float64)
+        values[:, :-1] = X[:, self._feature_index]
+        values[:, -1] = risk_scores
+
+        np.subtract(values, self.lower, out=values)
+        np.multiply(values, self._inv_width, out=values)
+        np.floor(values, out=values)
+        # fmax / fmin map NaN (e.g. Temp_Ratio for 0 K readings) to the underflow bin
+        np.fmax(values, -1, out=values)
+        np.fmin(values, self.n_bins, out=values)
+
+        flat = values.astype(np.intp)
+        flat += self._bin_base
+        flat += X[:, self._type_index].astype(np.intp)[:, None] * self._type_stride
+        return flat.ravel()
+
+    def update(self, X: np.ndarray, risk_scores: np.ndarray):
+        """
+        Add a batch of scored readings to the live sketches.
+
+        Args:
+            X: Engineered feature matrix (rows x feature_cols)
+            risk_scores: Binary model failure probabilities, one per row
+        """
+        if X.shape[0] == 1:
+            # Hot path for single predictions: copy the row, bin later in bulk
+            with self._lock:
+                self._pending_X[self._pending] = X[0]
+                self._pending_risk[self._pending] = risk_scores[0]
+                self._pending += 1
+                if self._pending == PENDING_ROWS:
+                    self._flush_pending()
+            return
+
+        flat = self._flat_bins(X, risk_scores)
+        counts = self.counts.reshape(-1)
+        if flat.size < counts.size:
+            # Small batches: scatter-add straight into the counters
+            with self._lock:
+                np.add.at(counts, flat, 1)
+        else:
+            batch_counts = np.bincount(flat, minlength=counts.size)
+            with self._lock:
+                counts += batch_counts
+
+    def _flush_pending(self):
+        """Bin buffered single readings (caller holds the lock)."""
+        if self._pending == 0:
+            return
+        flat = self._flat_bins(self._pending_X[:self._pending], self._pending_risk[:self._pending])
+        self.counts.reshape(-1)[:] += np.bincount(flat, minlength=self.counts.size)
+        self._pending = 0
+
+    def reset(self):
+        """Clear the live sketches (the reference profile is kept)."""
+        with self._lock:
+            self._pending = 0
+            self.counts[...] = 0
+
+    def report(self) -> dict:
+        """
+        Compare the live sketches against the reference profile.
+
+        Returns:
+            Dictionary with per-Type and overall PSI / KS scores per column
+        """
+        with self._lock:
+            self._flush_pending()
+            live = self.counts.copy()
+        reference = self.reference_counts
+
+        # Append an "all types" slice so everything is scored in one pass
+        live = np.concatenate([live, live.sum(axis=0, keepdims=True)])
+        reference = np.concatenate([reference, reference.sum(axis=0, keepdims=True)])
+        psi, ks = _drift_scores(live, reference)
+
+        live_samples = live[:, 0, :].sum(axis=1)
+        reference_samples = reference[:, 0, :].sum(axis=1)
+
+        scopes = []
+        for t, name in enumerate(self.types + ['all']):
+            has_data = live_samples[t] > 0 and reference_samples[t] > 0
+            features = {
+                column: {
+                    'psi': float(psi[t, c]) if has_data else None,
+                    'ks': float(ks[t, c]) if has_data else None,
+                    'status': _psi_status(psi[t, c]) if has_data else 'insufficient_data'
+                }
+                for c, column in enumerate(self.columns)
+            }
+            scopes.append({
+                'type': name,
+                'live_samples': int(live_samples[t]),
+                'reference_samples': int(reference_samples[t]),
+                'max_psi': float(psi[t].max()) if has_data else None,
+                'features': features
+            })
+
+        return {
+            'reference_source': self.source,
+            'reference_created_at': self.created_at,
+            'n_bins': self.n_bins,
+            'by_type': scopes[:-1],
+            'overall': scopes[-1]
+        }
+
+    def to_reference(self) -> dict:
+        """Serialize the current live counts as a reference profile."""
+        with self._lock:
+            self._flush_pending()
+        return {
+            'version': 1,
+            'source': self.source,
+            'created_at': self.created_at,
+            'types': self.types,
+            'columns': self.columns,
+            'n_bins': self.n_bins,
+            'lower': self.lower.tolist(),
+            'upper': self.upper.tolist(),
+            'counts': self.counts.tolist()
+        }
+
+
+def _drift_scores(live: np.ndarray, reference: np.ndarray):
+    """PSI and binned KS statistic along the last axis of two count arrays."""
+    p = live / np.maximum(live.sum(axis=-1, keepdims=True), 1)
+    q = reference / np.maximum(reference.sum(axis=-1, keepdims=True), 1)
+
+    ks = np.abs(np.cumsum(p, axis=-1) - np.cumsum(q, axis=-1)).max(axis=-1)
+
+    p = np.clip(p, _EPSILON, None)
+    q = np.clip(q, _EPSILON, None)
+    psi = ((p - q) * np.log(p / q)).sum(axis=-1)
+    return psi, ks
+
+
+def _psi_status(psi: float) -> str:
+    """Map a PSI value to a drift label."""
+    if psi >= PSI_SIGNIFICANT:
+        return 'significant'
+    if psi >= PSI_MODERATE:
+        return 'moderate'
+    return 'stable'
+
+
+def build_reference_profile(inference, df: pd.DataFrame, n_bins: int = 20, source: str = None) -> dict:
+    """
+    Build a reference profile from a baseline dataset.
+
+    Args:
+        inference: Loaded PredictiveMaintenanceInference instance
+        df: Baseline readings with Type and the five raw sensor columns.
+            Unit suffixes such as "Air temperature [K]" are accepted.
+        n_bins: Number of fixed-width bins per column
+        source: Free-form description of the baseline (e.g. file name)
+
+    Returns:
+        Reference profile dictionary (JSON serializable)
+    """
+    df = df.rename(columns=lambda c: re.sub(r'\s*\[.*\]$', '', str(c)))
+
+    X_df = inference.engineer_features(df)
+    X = X_df.to_numpy(dtype=np.float64)
+    risk_scores = inference.binary_model.predict_proba(X_df)[:, 1]
+
+    columns = [c for c in inference.feature_cols if c != TYPE_COLUMN] + [RISK_COLUMN]
+    feature_index = [inference.feature_cols.index(c) for c in columns[:-1]]
+    values = np.column_stack((X[:, feature_index], risk_scores))
+
+    monitor = FeatureDriftMonitor({
+        'source': source,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'types': [str(t) for t in inference.type_encoder.classes_],
+        'columns': columns,
+        'n_bins': n_bins,
+        'lower': np.nan_to_num(np.nanpercentile(values, 0.5, axis=0)).tolist(),
+        'upper': np.nan_to_num(np.nanpercentile(values, 99.5, axis=0)).tolist()
+    }, inference.feature_cols)
+    monitor.update(X, risk_scores)
+
+    return monitor.to_reference()
+
+
+# ============================================
+# Build a reference profile if run directly
+# ============================================
+
+if __name__ == "__main__":
+    import argparse
+    from inference import PredictiveMaintenanceInference
+
+    parser = argparse.ArgumentParser(description="Build a drift reference profile from a baseline CSV")
+    parser.add_argument('baseline_csv', help="CSV with Type and raw sensor columns")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--out', default=None, help="Output path (default: <model-dir>/drift_reference.json)")
+    parser.add_argument('--bins', type=int, default=20)
+    args = parser.parse_args()
+
+    inference = PredictiveMaintenanceInference(args.model_dir)
+    baseline = pd.read_csv(args.baseline_csv)
+    profile = build_reference_profile(
+        inference, baseline, n_bins=args.bins, source=os.path.basename(args.baseline_csv)
+    )
+
+    out_path = args.out or os.path.join(args.model_dir, 'drift_reference.json')
+    with open(out_path, 'w') as f:
+        json.dump(profile, f)
+    print(f"[OK] Drift reference profile written to '{out_path}' ({len(baseline)} rows)")
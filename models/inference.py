@@ -106,6 +106,12 @@ class PredictiveMaintenanceInference:
         else:
             self.explainer = None
 
+        # Optional input drift monitor (see drift_monitor.py), attached by the service
+        self.drift_monitor = None
+        
+        # Optional per-machine result reuse (see rescore_cache.py), attached by the service
+        self.rescore_cache = None
+
     def engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Apply feature engineering to input data.
@@ -150,11 +156,11 @@ class PredictiveMaintenanceInference:
         ).astype(int)
 
         # OSF (Overstrain Failure) risk calculation
-        def calc_osf_risk(row):
-            thresholds = {'L': 11000, 'M': 12000, 'H': 13000}
-            return row['Overstrain'] / thresholds.get(row['Type'], 12000)
-
-        df_eng['OSF_Risk_Ratio'] = df_eng.apply(calc_osf_risk, axis=1)
+        # Vectorized threshold lookup per product Type (row-wise apply was the
+        # slowest step of feature engineering for batches)
+        thresholds = {'L': 11000, 'M': 12000, 'H': 13000}
+        osf_threshold = df_eng['Type'].map(thresholds).fillna(12000)
+        df_eng['OSF_Risk_Ratio'] = df_eng['Overstrain'] / osf_threshold
         df_eng['OSF_Risk'] = (df_eng['OSF_Risk_Ratio'] > 1).astype(int)
         
         # Interaction features
@@ -174,7 +180,7 @@ class PredictiveMaintenanceInference:
         
         return df_eng[self.feature_cols]
 
-    def predict(self, sensor_data: dict) -> dict:
+    def predict(self, sensor_data: dict, machine_id: str = None) -> dict:
         """
         Make prediction for a single machine reading.
         
@@ -186,6 +192,8 @@ class PredictiveMaintenanceInference:
                 - Rotational speed: int (RPM, typically 1200-2000)
                 - Torque: float (Nm, typically 30-60)
                 - Tool wear: int (minutes, 0-240)
+            machine_id: Optional machine identifier, enables result reuse
+                when a rescore cache is attached
         
         Returns:
             Dictionary with:
@@ -195,19 +203,163 @@ class PredictiveMaintenanceInference:
                 - most_likely_failure: The predicted failure type
                 - recommended_action: What to do about it
                 - feature_contributions: Which features influenced the prediction
+                - reused: Whether the previous result for this machine was returned
         """
-        # Convert to DataFrame
-        df = pd.DataFrame([sensor_data])
+        return self.predict_batch([sensor_data], machine_ids=[machine_id])[0]
+
+    def _get_recommendation(self, failure_type: str, will_fail: bool) -> str:
+        """Generate maintenance recommendation based on predicted failure type."""
+        if not will_fail:
+            return "Normal operation - continue monitoring"
         
-        # Apply feature engineering
-        X = self.engineer_features(df)
+        recommendations = {
+            'TWF': "Schedule tool replacement - tool wear approaching critical level",
+            'HDF': "Check cooling system - heat dissipation issue detected",
+            'PWF': "Inspect power system - abnormal power consumption detected",
+            'OSF': "Reduce load or replace tool - overstrain condition detected",
+            'RNF': "Perform general inspection - random failure risk elevated",
+            'No Failure': "Normal operation - continue monitoring"
+        }
+        return recommendations.get(failure_type, "Schedule preventive maintenance inspection")
+    
+    def predict_batch(self, sensor_data_list: list, machine_ids: list = None) -> list:
+        """
+        Make predictions for multiple machines.
+        
+        Feature engineering, both models and SHAP run once over the whole
+        batch instead of once per reading. With a rescore cache attached,
+        readings nearly identical to a machine's last scored reading reuse
+        its previous result and are not scored again.
+        
+        Args:
+            sensor_data_list: List of sensor reading dictionaries
+            machine_ids: Optional machine identifier per reading
+            
+        Returns:
+            List of prediction dictionaries
+        """
+        if not sensor_data_list:
+            return []
+        
+        if self.rescore_cache is None or machine_ids is None:
+            return self._score_batch(sensor_data_list)
+        
+        results = self.rescore_cache.lookup(machine_ids, sensor_data_list)
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            pending_data = [sensor_data_list[i] for i in pending]
+            scored = self._score_batch(pending_data)
+            self.rescore_cache.store([machine_ids[i] for i in pending], pending_data, scored)
+            for i, result in zip(pending, scored):
+                # Copy so callers can annotate results without touching the cache
+                results[i] = dict(result)
+        return results
+    
+    def _score_binary(self, sensor_data_list: list):
+        """
+        Engineer features and run the binary model over a batch.
+        
+        Also feeds the drift sketches, so every scoring path updates them
+        the same way.
+        
+        Returns:
+            Tuple of (engineered feature matrix, failure probabilities)
+        """
+        # Convert to DataFrame and apply feature engineering
+        # The models, SHAP and the drift monitor all share one float matrix
+        # (converting once is much cheaper than per-consumer DataFrame handling)
+        df = pd.DataFrame(sensor_data_list)
+        X = self.engineer_features(df).to_numpy(dtype=np.float64)
         
         # Binary prediction (will it fail?)
-        failure_prob = self.binary_model.predict_proba(X)[0, 1]
-        will_fail = failure_prob > 0.5
+        failure_probs = self.binary_model.predict_proba(X)[:, 1]
+        
+        # Feed the drift sketches (if monitoring is enabled)
+        if self.drift_monitor is not None:
+            self.drift_monitor.update(X, failure_probs)
+        
+        return X, failure_probs
+    
+    def _score_batch(self, sensor_data_list: list) -> list:
+        """Run feature engineering, both models and SHAP over a batch."""
+        X, failure_probs = self._score_binary(sensor_data_list)
         
         # Multiclass prediction (what type of failure?)
-        failure_type_probs = self.multiclass_model.predict_proba(X)[0]
+        failure_type_probs = self.multiclass_model.predict_proba(X)
+        
+        shap_values = self._explain(X)
+        
+        return [
+            self._build_result(
+                failure_probs[i],
+                failure_type_probs[i],
+                shap_values[i] if shap_values is not None else None
+            )
+            for i in range(len(X))
+        ]
+
+    def predict_top_k(self, sensor_data_list: list, k: int) -> list:
+        """
+        Find the K readings with the highest failure risk.
+
+        Only the binary model runs over the whole input. The multiclass
+        model, SHAP and recommendations run for the K selected readings,
+        so explanation cost does not grow with the fleet size. Equal risk
+        scores are ranked by position in sensor_data_list.
+
+        Args:
+            sensor_data_list: List of sensor reading dictionaries
+            k: Number of highest-risk readings to return
+
+        Returns:
+            List of (index into sensor_data_list, prediction dictionary)
+            tuples, highest risk_score first
+        """
+        if not sensor_data_list or k <= 0:
+            return []
+
+        X, failure_probs = self._score_binary(sensor_data_list)
+
+        # Partial sort: O(n) selection of the K-th highest score, then keep
+        # every reading at or above it so ties at the boundary are all
+        # candidates (tree models produce many equal scores)
+        k = min(k, len(failure_probs))
+        threshold = -np.partition(-failure_probs, k - 1)[k - 1]
+        candidates = np.flatnonzero(failure_probs >= threshold)
+
+        # Order candidates by risk (descending), then request index
+        order = np.lexsort((candidates, -failure_probs[candidates]))
+        top = candidates[order[:k]]
+
+        X_top = X[top]
+        failure_type_probs = self.multiclass_model.predict_proba(X_top)
+        shap_values = self._explain(X_top)
+
+        return [
+            (
+                int(idx),
+                self._build_result(
+                    failure_probs[idx],
+                    failure_type_probs[i],
+                    shap_values[i] if shap_values is not None else None
+                )
+            )
+            for i, idx in enumerate(top)
+        ]
+    
+    def _explain(self, X: np.ndarray):
+        """Compute SHAP values for a batch, or None if SHAP is unavailable."""
+        if self.explainer is None:
+            return None
+        try:
+            return self.explainer.shap_values(X)
+        except Exception as e:
+            print(f"SHAP explanation failed: {e}")
+            return None
+    
+    def _build_result(self, failure_prob, failure_type_probs, shap_values=None) -> dict:
+        """Assemble the prediction dictionary for a single reading."""
+        will_fail = failure_prob > 0.5
         
         # ============================================
         # FIXED: Handle disagreement between models
@@ -229,16 +381,12 @@ class PredictiveMaintenanceInference:
         
         # Get feature contributions (if SHAP available)
         feature_contributions = []
-        if self.explainer is not None:
-            try:
-                shap_values = self.explainer.shap_values(X)[0]
-                top_indices = np.abs(shap_values).argsort()[::-1][:5]
-                feature_contributions = [
-                    {'feature': self.feature_cols[i], 'impact': float(shap_values[i])} 
-                    for i in top_indices
-                ]
-            except Exception as e:
-                print(f"SHAP explanation failed: {e}")
+        if shap_values is not None:
+            top_indices = np.abs(shap_values).argsort()[::-1][:5]
+            feature_contributions = [
+                {'feature': self.feature_cols[i], 'impact': float(shap_values[i])} 
+                for i in top_indices
+            ]
         
         # If no SHAP, use basic feature importance
         if not feature_contributions:
@@ -261,35 +409,9 @@ class PredictiveMaintenanceInference:
             },
             'most_likely_failure': most_likely_failure,
             'recommended_action': self._get_recommendation(most_likely_failure, will_fail),
-            'feature_contributions': feature_contributions
+            'feature_contributions': feature_contributions,
+            'reused': False
         }
-
-    def _get_recommendation(self, failure_type: str, will_fail: bool) -> str:
-        """Generate maintenance recommendation based on predicted failure type."""
-        if not will_fail:
-            return "Normal operation - continue monitoring"
-        
-        recommendations = {
-            'TWF': "Schedule tool replacement - tool wear approaching critical level",
-            'HDF': "Check cooling system - heat dissipation issue detected",
-            'PWF': "Inspect power system - abnormal power consumption detected",
-            'OSF': "Reduce load or replace tool - overstrain condition detected",
-            'RNF': "Perform general inspection - random failure risk elevated",
-            'No Failure': "Normal operation - continue monitoring"
-        }
-        return recommendations.get(failure_type, "Schedule preventive maintenance inspection")
-    
-    def predict_batch(self, sensor_data_list: list) -> list:
-        """
-        Make predictions for multiple machines.
-        
-        Args:
-            sensor_data_list: List of sensor reading dictionaries
-            
-        Returns:
-            List of prediction dictionaries
-        """
-        return [self.predict(data) for data in sensor_data_list]
     
     def get_model_info(self) -> dict:
         """Get information about the loaded models."""
@@ -0,0 +1,259 @@
+"""
+Model Registry Module
+=====================
+Serves several model sets (e.g. per plant or per machine family) from one
+service. Each model set is a directory with its own model_metadata.json and
+joblib files, loaded lazily on first use and evicted least-recently-used
+when the configured memory budget is exceeded.
+
+Memory is accounted with a proxy: the size of each set's serialized .joblib
+files. The in-process footprint (XGBoost boosters, SHAP TreeExplainer) is
+larger and is not measured, so size the budget with some headroom.
+
+Layout:
+    models/                      -> key "default"
+        model_metadata.json
+        binary_failure_model.joblib
+        ...
+        plant_a/                 -> key "plant_a"
+            model_metadata.json
+            ...
+
+Usage:
+    registry = ModelRegistry('models', memory_budget_mb=512)
+    engine = registry.get('plant_a')
+    result = engine.predict({...})
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from inference import PredictiveMaintenanceInference
+from drift_monitor import FeatureDriftMonitor
+from rescore_cache import RescoreCache
+
+
+METADATA_FILE = 'model_metadata.json'
+DRIFT_REFERENCE_FILE = 'drift_reference.json'
+
+
+class ModelEntry:
+    """A discovered model set and its load / usage counters."""
+
+    def __init__(self, key: str, model_dir: str):
+        self.key = key
+        self.model_dir = model_dir
+        self.engine = None
+        self.drift_monitor = None
+        self.rescore_cache = None
+        self.file_bytes = 0
+        self.load_time = 0.0
+        self.load_count = 0
+        self.eviction_count = 0
+        self.request_count = 0
+        self.last_used = None
+        self.load_lock = threading.Lock()
+
+    def stats(self) -> dict:
+        """Snapshot of the entry counters."""
+        return {
+            'key': self.key,
+            'model_dir': self.model_dir,
+            'loaded': self.engine is not None,
+            'model_file_mb': round(self.file_bytes / (1024 * 1024), 3),
+            'load_time_ms': round(self.load_time * 1000, 3),
+            'load_count': self.load_count,
+            'eviction_count': self.eviction_count,
+            'request_count': self.request_count,
+            'last_used': self.last_used,
+            'drift_monitoring': self.drift_monitor is not None,
+            'rescore_cache': self.rescore_cache.stats() if self.rescore_cache is not None else None
+        }
+
+
+class ModelRegistry:
+    """
+    Registry of model sets keyed by directory name.
+
+    This class:
+    1. Discovers model directories under a root directory
+    2. Loads a model set on first use
+    3. Evicts least-recently-used sets beyond the memory budget
+    4. Reports per-model load time, model file size and inference request counts
+    """
+
+    def __init__(self, root_dir='models', default_key='default', memory_budget_mb=0,
+                 rescore_cache_size=0, rescore_tolerances=None, rescore_idle_seconds=3600):
+        """
+        Initialize the registry and discover model sets.
+
+        Args:
+            root_dir: Directory holding the default model set and/or one
+                subdirectory per additional model set
+            default_key: Key used for a model set found directly in root_dir
+            memory_budget_mb: Budget for loaded model sets, compared against
+                their serialized .joblib size (0 = unlimited)
+            rescore_cache_size: Machines remembered per model set for result
+                reuse (0 = disabled, see rescore_cache.py)
+            rescore_tolerances: Per raw feature tolerances for result reuse
+            rescore_idle_seconds: Idle time before a machine is forgotten
+        """
+        self.root_dir = root_dir
+        self.default_key = default_key
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.rescore_cache_size = rescore_cache_size
+        self.rescore_tolerances = rescore_tolerances
+        self.rescore_idle_seconds = rescore_idle_seconds
+
+        if not os.path.isdir(root_dir):
+            raise FileNotFoundError(
+                f"Model directory '{root_dir}' not found. "
+                "Please copy the models from the ML team."
+            )
+
+        self.entries = {}
+        self._loaded = OrderedDict()  # key -> ModelEntry, least recently used first
+        self._lock = threading.Lock()
+        self.discover()
+
+    def discover(self):
+        """Scan root_dir for model sets; already known keys are kept."""
+        found = {}
+        if os.path.exists(os.path.join(self.root_dir, METADATA_FILE)):
+            found[self.default_key] = self.root_dir
+        for name in sorted(os.listdir(self.root_dir)):
+            model_dir = os.path.join(self.root_dir, name)
+            if os.path.isdir(model_dir) and os.path.exists(os.path.join(model_dir, METADATA_FILE)):
+                found[name] = model_dir
+
+        with self._lock:
+            for key, model_dir in found.items():
+                if key not in self.entries:
+                    self.entries[key] = ModelEntry(key, model_dir)
+        return list(found)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def keys(self) -> list:
+        return list(self.entries)
+
+    def is_loaded(self, key: str) -> bool:
+        entry = self.entries.get(key)
+        return entry is not None and entry.engine is not None
+
+    def is_available(self, key: str) -> bool:
+        """Whether a model set has loaded successfully at least once."""
+        entry = self.entries.get(key)
+        return entry is not None and entry.load_count > 0
+
+    def get(self, key: str = None, count_request: bool = False) -> PredictiveMaintenanceInference:
+        """
+        Get the inference engine for a model set, loading it if needed.
+
+        Args:
+            key: Model set key (defaults to default_key)
+            count_request: Count this access as an inference request
+                (False for warm-up and metadata lookups)
+
+        Returns:
+            Loaded PredictiveMaintenanceInference instance
+
+        Raises:
+            KeyError: If no model set with that key was discovered
+        """
+        key = key or self.default_key
+        entry = self.entries.get(key)
+        if entry is None:
+            raise KeyError(f"Unknown model '{key}'")
+
+        with self._lock:
+            if count_request:
+                entry.request_count += 1
+            entry.last_used = time.time()
+            engine = entry.engine
+            if engine is not None:
+                self._loaded.move_to_end(key)
+                return engine
+
+        # Load outside the registry lock so other model sets stay available.
+        # Return local references only: another thread's load may evict this
+        # entry (entry.engine = None) at any point after the lock is released.
+        with entry.load_lock:
+            engine = entry.engine
+            if engine is None:
+                engine = self._load(entry)
+            return engine
+
+    def _load(self, entry: ModelEntry) -> PredictiveMaintenanceInference:
+        started = time.perf_counter()
+        engine = PredictiveMaintenanceInference(entry.model_dir)
+
+        # Drift sketches survive eviction, so only build the monitor once
+        if entry.drift_monitor is None:
+            reference_path = os.path.join(entry.model_dir, DRIFT_REFERENCE_FILE)
+            if os.path.exists(reference_path):
+                try:
+                    entry.drift_monitor = FeatureDriftMonitor.load(reference_path, engine.feature_cols)
+                except Exception as e:
+                    print(f"[WARNING] Could not load drift reference for '{entry.key}': {e}")
+        engine.drift_monitor = entry.drift_monitor
+
+        # Stored results stay valid across eviction since the model files are unchanged
+        if entry.rescore_cache is None and self.rescore_cache_size > 0:
+            entry.rescore_cache = RescoreCache(
+                capacity=self.rescore_cache_size,
+                tolerances=self.rescore_tolerances,
+                idle_seconds=self.rescore_idle_seconds
+            )
+        engine.rescore_cache = entry.rescore_cache
+
+        with self._lock:
+            entry.engine = engine
+            entry.load_time = time.perf_counter() - started
+            entry.file_bytes = _model_file_size(entry.model_dir)
+            entry.load_count += 1
+            self._loaded[entry.key] = entry
+            self._evict(keep=entry.key)
+        print(f"[OK] Model '{entry.key}' loaded in {entry.load_time * 1000:.0f} ms")
+        return engine
+
+    def _evict(self, keep: str):
+        """Drop least-recently-used model sets until within the memory budget."""
+        if self.memory_budget <= 0:
+            return
+        while self.loaded_file_size() > self.memory_budget and len(self._loaded) > 1:
+            key, entry = next(iter(self._loaded.items()))
+            if key == keep:
+                self._loaded.move_to_end(key)
+                continue
+            del self._loaded[key]
+            # In-flight requests keep their own reference to the engine
+            entry.engine = None
+            entry.eviction_count += 1
+            print(f"[OK] Model '{key}' evicted (memory budget exceeded)")
+
+    def loaded_file_size(self) -> int:
+        return sum(entry.file_bytes for entry in self._loaded.values())
+
+    def stats(self) -> dict:
+        """Registry-wide and per-model counters."""
+        with self._lock:
+            return {
+                'default_model': self.default_key,
+                'memory_budget_mb': round(self.memory_budget / (1024 * 1024), 3),
+                'loaded_model_file_mb': round(self.loaded_file_size() / (1024 * 1024), 3),
+                'loaded_models': list(self._loaded),
+                'models': [entry.stats() for entry in self.entries.values()]
+            }
+
+
+def _model_file_size(model_dir: str) -> int:
+    """Serialized size of a model set, used as its memory proxy."""
+    return sum(
+        os.path.getsize(os.path.join(model_dir, name))
+        for name in os.listdir(model_dir)
+        if name.endswith('.joblib')
+    )
@@ -0,0 +1,206 @@
+"""
+Incremental Rescoring Module
+============================
+Remembers, per machine_id, the last raw reading that was actually scored and
+its prediction. A new reading whose Type matches and whose sensor deltas all
+fall within per-feature tolerances reuses that prediction instead of running
+the models.
+
+The comparison is always against the last *scored* reading, not the last
+reused one, so slow drift still triggers a rescore once it accumulates past
+the tolerance.
+
+Storage is a fixed-capacity array table (one row per machine). Machines
+idle for longer than idle_seconds are evicted, and when the table is full
+the least recently seen machine is replaced.
+
+Usage:
+    cache = RescoreCache(capacity=10000, tolerances={'Torque': 0.5})
+    inference.rescore_cache = cache
+    results = inference.predict_batch(readings, machine_ids=['m1', 'm2'])
+"""
+
+import numpy as np
+import threading
+import time
+
+
+RAW_FEATURES = ['Air temperature', 'Process temperature', 'Rotational speed', 'Torque', 'Tool wear']
+
+# Default absolute tolerances per raw feature; tool wear changes always rescore
+DEFAULT_TOLERANCES = {
+    'Air temperature': 0.05,
+    'Process temperature': 0.05,
+    'Rotational speed': 2,
+    'Torque': 0.2,
+    'Tool wear': 0
+}
+
+
+class RescoreCache:
+    """
+    Array-backed table of the last scored reading and result per machine.
+
+    This class:
+    1. Checks a batch of readings against the stored ones in one vectorized pass
+    2. Returns stored predictions for readings within tolerance
+    3. Stores fresh predictions, evicting idle or least recently seen machines
+    4. Counts how much scoring work was avoided
+    """
+
+    def __init__(self, capacity=10000, tolerances=None, idle_seconds=3600):
+        """
+        Initialize an empty table.
+
+        Args:
+            capacity: Maximum number of machines tracked
+            tolerances: Absolute tolerance per raw feature (missing
+                features use DEFAULT_TOLERANCES)
+            idle_seconds: Machines not seen for this long are evicted
+        """
+        self.capacity = max(1, int(capacity))
+        self.idle_seconds = idle_seconds
+        merged = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+        self.tolerances = np.array([float(merged[f]) for f in RAW_FEATURES])
+
+        self._values = np.zeros((self.capacity, len(RAW_FEATURES)), dtype=np.float64)
+        self._types = np.zeros(self.capacity, dtype='<U1')
+        self._last_seen = np.zeros(self.capacity, dtype=np.float64)
+        self._occupied = np.zeros(self.capacity, dtype=bool)
+        self._results = [None] * self.capacity
+        self._machine_ids = [None] * self.capacity
+        self._slots = {}
+        self._free = list(range(self.capacity - 1, -1, -1))
+        self._last_sweep = time.time()
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.untracked = 0
+        self.reused = 0
+        self.idle_evictions = 0
+        self.capacity_evictions = 0
+
+    @staticmethod
+    def _to_arrays(sensor_data_list: list):
+        values = np.array([[d[f] for f in RAW_FEATURES] for d in sensor_data_list], dtype=np.float64)
+        types = np.array([d['Type'] for d in sensor_data_list], dtype='<U1')
+        return values, types
+
+    def lookup(self, machine_ids: list, sensor_data_list: list) -> list:
+        """
+        Find readings that can reuse a stored prediction.
+
+        Args:
+            machine_ids: Machine identifier per reading (None = never reused)
+            sensor_data_list: Raw sensor reading dictionaries
+
+        Returns:
+            List with a copy of the stored prediction (marked reused) for
+            each reading within tolerance, None for readings to be scored
+        """
+        n = len(sensor_data_list)
+        values, types = self._to_arrays(sensor_data_list)
+        now = time.time()
+
+        with self._lock:
+            slots = np.array(
+                [self._slots.get(mid, -1) if mid is not None else -1 for mid in machine_ids],
+                dtype=np.intp
+            )
+            within = slots >= 0
+            if within.any():
+                known = slots[within]
+                within[within] = (
+                    (self._types[known] == types[within]) &
+                    (np.abs(values[within] - self._values[known]) <= self.tolerances).all(axis=1)
+                )
+
+            reused_slots = slots[within]
+            self._last_seen[reused_slots] = now
+            # Readings without a machine_id can never be reused; keep them out of the ratio
+            untracked = sum(mid is None for mid in machine_ids)
+            self.untracked += untracked
+            self.lookups += n - untracked
+            self.reused += len(reused_slots)
+
+            return [
+                {**self._results[slots[i]], 'reused': True} if within[i] else None
+                for i in range(n)
+            ]
+
+    def store(self, machine_ids: list, sensor_data_list: list, results: list):
+        """
+        Remember freshly scored readings and their predictions.
+
+        Args:
+            machine_ids: Machine identifier per reading (None entries are skipped)
+            sensor_data_list: Raw sensor reading dictionaries that were scored
+            results: Prediction dictionaries, one per reading
+        """
+        values, types = self._to_arrays(sensor_data_list)
+        now = time.time()
+
+        with self._lock:
+            if now - self._last_sweep > min(self.idle_seconds, 60):
+                self._evict_idle(now)
+
+            for i, machine_id in enumerate(machine_ids):
+                if machine_id is None:
+                    continue
+                slot = self._slots.get(machine_id)
+                if slot is None:
+                    slot = self._allocate(now)
+                    self._slots[machine_id] = slot
+                    self._machine_ids[slot] = machine_id
+                    self._occupied[slot] = True
+                self._values[slot] = values[i]
+                self._types[slot] = types[i]
+                self._results[slot] = results[i]
+                self._last_seen[slot] = now
+
+    def _release(self, slot: int):
+        del self._slots[self._machine_ids[slot]]
+        self._machine_ids[slot] = None
+        self._results[slot] = None
+        self._occupied[slot] = False
+        self._free.append(slot)
+
+    def _evict_idle(self, now: float):
+        self._last_sweep = now
+        idle = np.flatnonzero(self._occupied & (self._last_seen < now - self.idle_seconds))
+        for slot in idle:
+            self._release(int(slot))
+        self.idle_evictions += len(idle)
+
+    def _allocate(self, now: float) -> int:
+        if not self._free:
+            self._evict_idle(now)
+        if not self._free:
+            # Table full of active machines: replace the least recently seen
+            oldest = int(np.argmin(np.where(self._occupied, self._last_seen, np.inf)))
+            self._release(oldest)
+            self.capacity_evictions += 1
+        return self._free.pop()
+
+    def clear(self):
+        """Forget all machines (counters are kept)."""
+        with self._lock:
+            for slot in np.flatnonzero(self._occupied):
+                self._release(int(slot))
+
+    def stats(self) -> dict:
+        """Table size and counters of avoided scoring work."""
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'machines': len(self._slots),
+                'tolerances': dict(zip(RAW_FEATURES, self.tolerances.tolist())),
+                'idle_seconds': self.idle_seconds,
+                'lookups': self.lookups,
+                'untracked': self.untracked,
+                'reused': self.reused,
+                'scored': self.lookups - self.reused,
+                'reuse_ratio': round(self.reused / self.lookups, 4) if self.lookups else 0.0,
+                'idle_evictions': self.idle_evictions,
+                'capacity_evictions': self.capacity_evictions
+            }
@@ -114,7 +114,11 @@ class DiagnosticsHandler {
                 const response = await axios.post(
                     `${process.env.FASTAPIPROTOCOL}://${process.env.FASTAPIHOST}:${process.env.FASTAPIPORT}/api/predict`,
                     payload,
-                    { timeout: 10000 }
+                    {
+                        timeout: 10000,
+                        // Sweep traffic yields to interactive predictions
+                        headers: { 'X-Request-Priority': 'bulk' }
+                    }
                 );
 
                 const diagnostics = {
@@ -0,0 +1,63 @@
+"""
+Tests for the input drift monitor.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'models')
+sys.path.insert(0, MODEL_DIR)
+
+from inference import PredictiveMaintenanceInference  # noqa: E402
+from drift_monitor import build_reference_profile, FeatureDriftMonitor  # noqa: E402
+
+
+def _baseline(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Type': rng.choice(['L', 'M', 'H'], n),
+        'Air temperature [K]': rng.normal(300, 2, n),
+        'Process temperature [K]': rng.normal(310, 1.5, n),
+        'Rotational speed [rpm]': rng.normal(1538, 179, n).astype(int),
+        'Torque [Nm]': rng.normal(40, 10, n).clip(1),
+        'Tool wear [min]': rng.integers(0, 250, n)
+    })
+
+
+def test_zero_kelvin_reading_is_binned_not_rejected():
+    inference = PredictiveMaintenanceInference(MODEL_DIR)
+    reference = build_reference_profile(inference, _baseline())
+    inference.drift_monitor = FeatureDriftMonitor(reference, inference.feature_cols)
+
+    # Passes SensorData validation; Temp_Ratio is 0/0 = NaN
+    result = inference.predict({
+        'Type': 'L',
+        'Air temperature': 0.0,
+        'Process temperature': 0.0,
+        'Rotational speed': 1350,
+        'Torque': 45.0,
+        'Tool wear': 210
+    })
+
+    assert 0.0 <= result['risk_score'] <= 1.0
+    report = inference.drift_monitor.report()
+    assert report['overall']['live_samples'] == 1
+
+
+def test_buffered_single_rows_match_batch_update():
+    inference = PredictiveMaintenanceInference(MODEL_DIR)
+    baseline = _baseline(n=600, seed=1).rename(columns=lambda c: c.split(' [')[0])
+    reference = build_reference_profile(inference, baseline)
+    X = inference.engineer_features(baseline).to_numpy(dtype=np.float64)
+    risk = np.linspace(0, 1, len(X))
+
+    single = FeatureDriftMonitor(reference, inference.feature_cols)
+    batch = FeatureDriftMonitor(reference, inference.feature_cols)
+    for i in range(len(X)):
+        single.update(X[i:i + 1], risk[i:i + 1])
+    batch.update(X, risk)
+
+    assert single.report() == batch.report()
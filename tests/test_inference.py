@@ -0,0 +1,48 @@
+"""
+Tests for the inference engine's top-K ranking.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'models')
+sys.path.insert(0, MODEL_DIR)
+
+from inference import PredictiveMaintenanceInference  # noqa: E402
+
+
+def _readings(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Type': rng.choice(['L', 'M', 'H'], n),
+        'Air temperature': rng.normal(300, 2, n),
+        'Process temperature': rng.normal(310, 1.5, n),
+        'Rotational speed': rng.normal(1538, 179, n).astype(int),
+        'Torque': rng.normal(40, 10, n).clip(1),
+        'Tool wear': rng.integers(0, 250, n)
+    }).to_dict('records')
+
+
+def test_top_k_breaks_ties_by_request_index():
+    inference = PredictiveMaintenanceInference(MODEL_DIR)
+    readings = _readings()
+    risk = np.array([r['risk_score'] for r in inference.predict_batch(readings)])
+
+    # Full stable ranking: risk descending, then request index
+    expected = sorted(range(len(readings)), key=lambda i: (-risk[i], i))
+
+    for k in (1, 5, 20, 50):
+        ranked = inference.predict_top_k(readings, k)
+        assert [idx for idx, _ in ranked] == expected[:k]
+
+
+def test_top_k_matches_full_predictions():
+    inference = PredictiveMaintenanceInference(MODEL_DIR)
+    readings = _readings(n=50, seed=1)
+    full = inference.predict_batch(readings)
+
+    for idx, result in inference.predict_top_k(readings, 5):
+        assert result == full[idx]